@@ -1,172 +1,111 @@
 import os
 import sys
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-import pandas as pd
-import textwrap
-import ast
+from pathlib import Path
+from google.oauth2.service_account import Credentials
+from google.auth.transport.requests import AuthorizedSession
 import json
-
-# Function to parse string tuples (e.g., "(2103, 167)") into real tuple objects
-def parse_tuple_string(tuple_string):
-    try:
-        return ast.literal_eval(tuple_string)
-    except (ValueError, SyntaxError):
-        print(f"Error parsing tuple string: {tuple_string}")
+import hashlib
+import pickle
+from svg_core import values_to_rows, build_svg_elements, write_html
+
+# Google Sheet holding the data, and the ranges fetched from it in a single batchGet call
+SHEET_ID = "1EcEWYavEFsQIJkmr0VGgGiHbqXIrJKFIW_d3mM_teXc"
+SHEET_RANGES = ['position!A:Z']
+
+# REST endpoint for the sheet's values
+SHEETS_API_URL = f"https://sheets.googleapis.com/v4/spreadsheets/{SHEET_ID}"
+
+# Development cache: fetched sheet values are pickled here and reused without checking the sheet
+# for changes, so repeated local runs skip the network. Set FORCE_REFRESH=1 to fetch fresh data.
+# The directory is dedicated to this script, since stale pickles in it are deleted
+CACHE_DIRECTORY = os.path.join(os.getcwd(), '.cache', 'sheet_values')
+
+# Function to build the cache file path for the requested sheet data
+def get_cache_path(sheet_id):
+    key = hashlib.sha256(f"{sheet_id}:{SHEET_RANGES}".encode()).hexdigest()
+    return os.path.join(CACHE_DIRECTORY, f"{key}.pickle")
+
+# Function to load cached sheet values, returns None if nothing usable is cached
+def load_cached_values(cache_path):
+    if os.environ.get('FORCE_REFRESH') == '1' or not os.path.exists(cache_path):
         return None
-
-# Convert 'font_size' column to integers, handle missing or invalid values
-def parse_font_size(font_size):
     try:
-        return int(font_size)
-    except (ValueError, TypeError):
-        print(f"Error converting font size: {font_size}")
+        with open(cache_path, 'rb') as cache_file:
+            return pickle.load(cache_file)
+    except (OSError, pickle.UnpicklingError, EOFError) as e:
+        print(f"Error loading cache file {cache_path}: {e}")
         return None
 
-# Function to calculate the center of the rectangle and wrap the label text
-def get_centered_position(x0, y0, x1, y1, label, font_size):
-    center_x = (x0 + x1) // 2
-    center_y = (y0 + y1) // 2
-
-    # Approximate text dimensions (assuming average character width)
-    average_char_width = font_size * 0.6  # Approximate average character width
-    max_line_length = 20  # Maximum characters per line
-    wrapped_text = textwrap.fill(label, width=max_line_length)
-
-    lines = wrapped_text.split('\n')
-    text_height = font_size * len(lines)
-    text_width = max([len(line) for line in lines]) * average_char_width
-
-    # Calculate the position to draw the text at the center of the rectangle
-    text_x = center_x - text_width // 2
-    text_y = center_y - text_height // 2
-
-    return text_x, text_y, wrapped_text
+# Function to store fetched sheet values in the cache, removing entries for other requests
+def save_cached_values(cache_path, value_ranges):
+    try:
+        os.makedirs(CACHE_DIRECTORY, exist_ok=True)
+        with open(cache_path, 'wb') as cache_file:
+            pickle.dump(value_ranges, cache_file, protocol=5)
+        for old_cache_path in Path(CACHE_DIRECTORY).glob('*.pickle'):
+            if old_cache_path != Path(cache_path):
+                old_cache_path.unlink(missing_ok=True)
+    except OSError as e:
+        print(f"Error saving cache file {cache_path}: {e}")
 
 def main():
     try:
-        # Authorize the service account for Google Sheets
-        print("Loading Google Service Account credentials...")
-        # Load credentials from environment variable
-        service_account_json = os.environ.get('GOOGLE_SERVICE_ACCOUNT_JSON')
-        if not service_account_json:
-            raise EnvironmentError("The environment variable 'GOOGLE_SERVICE_ACCOUNT_JSON' is not set.")
-        service_account_info = json.loads(service_account_json)
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(
-            service_account_info,
-            scopes=["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-        )
-        gc = gspread.authorize(creds)
-        print("Google Service Account credentials loaded successfully.")
-
-        # Fetch the data from Google Sheets using the service account
-        print("Fetching data from Google Sheets...")
-        sheet_url = "https://docs.google.com/spreadsheets/d/1EcEWYavEFsQIJkmr0VGgGiHbqXIrJKFIW_d3mM_teXc/edit?usp=sharing"
-        spreadsheet = gc.open_by_url(sheet_url)
-        position_sheet = spreadsheet.worksheet('position')
-        position_data = position_sheet.get_all_records()
-        print("Position data fetched successfully.")
-
-        # Convert the data to a pandas DataFrame for easier processing
-        df = pd.DataFrame(position_data)
-        print("Position DataFrame loaded successfully. First 5 rows:")
-        print(df.head())
-
-        # Apply the function to each of the corner position columns
-        for col in ['Corner Position 1', 'Corner Position 2', 'Corner Position 3', 'Corner Position 4']:
-            df[col] = df[col].apply(parse_tuple_string)
-
-        df['font_size'] = df['font_size'].apply(parse_font_size)
-
-        # Debug: Ensure data was parsed correctly
-        print("Data after parsing:")
-        print(df.head())
-
-        # Initialize SVG code
-        svg_elements = []
-
-        # Add a placeholder background (a plain white rectangle)
-        svg_code = f'''<svg width="1000" height="1000" xmlns="http://www.w3.org/2000/svg">
-          <rect width="1000" height="1000" style="fill:white;" />
-        '''
-
-        # Loop through the DataFrame and add each label to the SVG
-        for index, row in df.iterrows():
-            label = row['Label']
-            corner1 = row['Corner Position 1']
-            corner3 = row['Corner Position 3']
-            font_size = row['font_size']
-
-            # If font_size is not specified or invalid, set a default font size
-            if not font_size:
-                font_size = 40  # Default font size
-
-            # Draw the rectangle outline
-            if corner1 and corner3:
-                x0 = min(corner1[0], corner3[0])
-                y0 = min(corner1[1], corner3[1])
-                x1 = max(corner1[0], corner3[0])
-                y1 = max(corner1[1], corner3[1])
-
-                width = x1 - x0
-                height = y1 - y0
-
-                # Add rectangle to SVG elements
-                rect_element = f'<rect x="{x0}" y="{y0}" width="{width}" height="{height}" style="stroke:black; fill:none; stroke-width:2"/>'
-                svg_elements.append(rect_element)
-
-                # Get the centered position for the label
-                text_x, text_y, wrapped_text = get_centered_position(x0, y0, x1, y1, label, font_size)
-
-                # Add the label at the centered position
-                # For multi-line text, need to add multiple <tspan> elements
-                lines = wrapped_text.split('\n')
-                text_element = f'<text x="{text_x}" y="{text_y + font_size}" font-size="{font_size}" fill="black">'
-                dy = 0
-                for line in lines:
-                    text_element += f'<tspan x="{text_x}" dy="{dy}">{line}</tspan>'
-                    dy = font_size  # Move down by font_size for next line
-                text_element += '</text>'
-                svg_elements.append(text_element)
-
-        # Combine all SVG elements
-        for element in svg_elements:
-            svg_code += element + '\n'
-
-        # Close the SVG tag
-        svg_code += '</svg>'
-
-        # Wrap the SVG code into an HTML template
-        html_code = f'''<!DOCTYPE html>
-        <html>
-        <head>
-            <title>Generated HTML</title>
-        </head>
-        <body>
-            {svg_code}
-        </body>
-        </html>
-        '''
+        # Reuse the cached sheet values if there are any, skipping the network entirely
+        cache_path = get_cache_path(SHEET_ID)
+        value_ranges = load_cached_values(cache_path)
+
+        if value_ranges is not None:
+            print(f"Loaded cached sheet data from {cache_path} (set FORCE_REFRESH=1 to fetch fresh data)")
+        else:
+            # Authorize the service account for Google Sheets
+            print("Loading Google Service Account credentials...")
+            # Load credentials from environment variable
+            service_account_json = os.environ.get('GOOGLE_SERVICE_ACCOUNT_JSON')
+            if not service_account_json:
+                raise EnvironmentError("The environment variable 'GOOGLE_SERVICE_ACCOUNT_JSON' is not set.")
+            service_account_info = json.loads(service_account_json)
+            creds = Credentials.from_service_account_info(
+                service_account_info,
+                scopes=["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+            )
+            # Keep-alive HTTP session for the API request below
+            session = AuthorizedSession(creds)
+            print("Google Service Account credentials loaded successfully.")
+
+            # Fetch all ranges from Google Sheets in one request instead of one per worksheet
+            print("Fetching data from Google Sheets...")
+            response = session.get(f"{SHEETS_API_URL}/values:batchGet", params={'ranges': SHEET_RANGES})
+            response.raise_for_status()
+            result = response.json()
+            value_ranges = [value_range.get('values', []) for value_range in result.get('valueRanges', [])]
+            save_cached_values(cache_path, value_ranges)
+            print("Position data fetched successfully.")
+
+        # Convert the data to a list of rows, the tables are small enough for plain tuples
+        rows = values_to_rows(value_ranges[0], 'Position')
+        print("Position rows loaded successfully. First 5 rows:")
+        for row in rows[:5]:
+            print(row)
+
+        # Parse the rows and build the SVG elements
+        svg_elements = build_svg_elements(rows)
 
         # Define the path where you want to save the HTML file
-        output_directory = os.path.join(os.getcwd(), 'docs')
-        os.makedirs(output_directory, exist_ok=True)
-        output_html_path = os.path.join(output_directory, 'index.html')
+        output_directory = Path.cwd() / 'docs'
+        output_directory.mkdir(parents=True, exist_ok=True)
+        output_html_path = output_directory / 'index.html'
 
         # Save the HTML code to the file
         try:
             print(f"Attempting to save HTML to {output_html_path}")
-            with open(output_html_path, 'w') as html_file:
-                html_file.write(html_code)
+            write_html(output_html_path, svg_elements)
             print(f"New HTML file saved to {output_html_path}")
         except Exception as e:
             print(f"Error saving HTML file: {e}")
             raise
 
-        # Create a .nojekyll file in the output directory
-        nojekyll_path = os.path.join(output_directory, '.nojekyll')
-        with open(nojekyll_path, 'w') as f:
-            pass  # Just create an empty file
+        # Create a .nojekyll file in the output directory, leaving an existing one untouched
+        (output_directory / '.nojekyll').touch(exist_ok=True)
 
         print(f"Created .nojekyll in {output_directory}")
 
@@ -0,0 +1,181 @@
+# Parsing and SVG rendering shared by the entry points that fetch the sheet data
+import numpy as np
+import textwrap
+import html
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+# Regular expression matching the coordinate tuples ast.literal_eval accepted, such as
+# "(2103, 167)", "[2103, 167]", "2103, 167", "(2103.5, 167)" or "(2103, 167, 0)"
+# Brackets must match, and only the first two values are used, as before
+# Decimal coordinates are truncated to whole pixels when the rectangles are built
+_NUMBER = r'-?(?:\d+(?:\.\d*)?|\.\d+)'
+TUPLE_PATTERN = re.compile(
+    rf'\s*(?:(\()|(\[))?\s*({_NUMBER})\s*,\s*({_NUMBER})(?:\s*,\s*{_NUMBER})*\s*,?\s*(?(1)\))(?(2)\])\s*'
+)
+
+# Opposite corners of each rectangle, the only corner columns the drawing uses
+# (header names with non-word characters replaced by underscores, see values_to_rows)
+CORNER_FIELDS = ['Corner_Position_1', 'Corner_Position_3']
+
+# Default font size for rows without a valid one
+DEFAULT_FONT_SIZE = 40
+
+# Function to turn a list of sheet rows (header row first) into a list of namedtuples, like get_all_records
+def values_to_rows(values, name):
+    if not values:
+        return []
+    header = values[0]
+    fields = [re.sub(r'\W+', '_', str(column).strip()) for column in header]
+    row_type = namedtuple(name, fields, rename=True)
+    # The API drops trailing empty cells, so pad every row to the header width
+    return [row_type(*(row + [''] * len(header))[:len(header)]) for row in values[1:]]
+
+# Function to parse the string tuples of several fields of every row
+# Returns an array of shape (rows, fields, 2), with NaN where a cell could not be parsed
+def parse_tuple_fields(rows, fields):
+    coords = np.full((len(rows), len(fields), 2), np.nan)
+    for i, row in enumerate(rows):
+        for j, field in enumerate(fields):
+            tuple_string = getattr(row, field)
+            match = TUPLE_PATTERN.fullmatch(str(tuple_string))
+            if match:
+                coords[i, j] = float(match.group(3)), float(match.group(4))
+            else:
+                print(f"Error parsing tuple string: {tuple_string}")
+    return coords
+
+# Function to convert a font size cell to an integer, falling back to the default when missing or invalid
+def parse_font_size(font_size):
+    try:
+        font_size = int(float(font_size))
+    except (ValueError, TypeError, OverflowError):
+        return DEFAULT_FONT_SIZE
+    return font_size or DEFAULT_FONT_SIZE
+
+# SVG element templates, bound once so the hot loops only call str.format
+_RECT_FMT = '<rect x="{}" y="{}" width="{}" height="{}" style="stroke:black; fill:none; stroke-width:2"/>'.format
+_TEXT_FMT = '<text x="{}" y="{}" font-size="{}" fill="black">{}</text>'.format
+_TSPAN_FMT = '<tspan x="{}" dy="{}">{}</tspan>'.format
+
+# Maximum characters per line of a wrapped label
+MAX_LINE_LENGTH = 20
+_WRAPPER = textwrap.TextWrapper(width=MAX_LINE_LENGTH)
+
+# Function to wrap a label, memoized so repeated labels are only wrapped once
+@lru_cache(maxsize=4096)
+def _wrap(label):
+    return _WRAPPER.fill(label)
+
+# Function to calculate the centered text positions of all rectangles at once
+# Takes one array per argument and returns the text_x and text_y arrays
+def get_centered_positions(x0, y0, x1, y1, font_size, line_count, max_line_length):
+    center_x = (x0 + x1) // 2
+    center_y = (y0 + y1) // 2
+
+    # Approximate text dimensions (assuming average character width)
+    average_char_width = font_size * 0.6  # Approximate average character width
+    text_height = font_size * line_count
+    text_width = max_line_length * average_char_width
+
+    # Calculate the position to draw the text at the center of the rectangle
+    text_x = center_x - text_width // 2
+    text_y = center_y - text_height // 2
+
+    return text_x, text_y
+
+
+# Opening SVG tag with a placeholder background (a plain white rectangle)
+SVG_HEADER = '''<svg width="1000" height="1000" xmlns="http://www.w3.org/2000/svg">
+          <rect width="1000" height="1000" style="fill:white;" />
+        '''
+
+# HTML template wrapped around the SVG code
+HTML_HEAD = '''<!DOCTYPE html>
+        <html>
+        <head>
+            <title>Generated HTML</title>
+        </head>
+        <body>
+            '''
+HTML_TAIL = '''
+        </body>
+        </html>
+        '''
+
+# Function to build the SVG elements (rectangles and their labels) for a list of position rows
+def build_svg_elements(rows):
+    # Parse the corner fields into integer coordinates
+    coords = parse_tuple_fields(rows, CORNER_FIELDS)
+
+    # Rows without both corners can't be drawn, so drop them up front (decimals are truncated to whole pixels)
+    valid = ~np.isnan(coords).any(axis=(1, 2))
+    rows = [row for row, is_valid in zip(rows, valid) if is_valid]
+    coords = coords[valid].astype(np.int32)
+
+    # Font sizes arrive as formatted strings; missing, invalid or zero sizes fall back to the default
+    font_sizes = np.array([parse_font_size(row.font_size) for row in rows], dtype=np.int32)
+
+    # Debug: Ensure data was parsed correctly
+    print("Data after parsing:")
+    for row, corners, font_size in zip(rows[:5], coords, font_sizes):
+        print(row.Label, corners.tolist(), font_size)
+
+    # Initialize SVG code
+    svg_elements = []
+
+    # Compute the rectangle bounds for all rows at once, one array per coordinate
+    c1x, c1y = coords[:, 0, 0], coords[:, 0, 1]
+    c3x, c3y = coords[:, 1, 0], coords[:, 1, 1]
+    x0s = np.minimum(c1x, c3x)
+    y0s = np.minimum(c1y, c3y)
+    x1s = np.maximum(c1x, c3x)
+    y1s = np.maximum(c1y, c3y)
+    widths = x1s - x0s
+    heights = y1s - y0s
+
+    # Build the rectangle outlines for all rows in one pass
+    rect_elements = [
+        _RECT_FMT(x0, y0, width, height)
+        for x0, y0, width, height in zip(x0s, y0s, widths, heights)
+    ]
+
+    # Wrap the labels (string work stays in Python), then center all of them at once
+    wrapped_texts = [_wrap(str(row.Label)) for row in rows]
+    wrapped_lines = [wrapped_text.split('\n') for wrapped_text in wrapped_texts]
+    line_counts = np.array([len(lines) for lines in wrapped_lines])
+    max_line_lengths = np.array([max(len(line) for line in lines) for lines in wrapped_lines])
+    text_xs, text_ys = get_centered_positions(
+        x0s, y0s, x1s, y1s, font_sizes, line_counts, max_line_lengths)
+
+    # Escape the labels for SVG after wrapping and measuring, so entities don't count towards line widths
+    escaped_lines = [html.escape(wrapped_text, quote=False).split('\n') for wrapped_text in wrapped_texts]
+
+    # Loop through the rectangles and add each one with its label to the SVG
+    for rect_element, lines, font_size, text_x, text_y in zip(
+            rect_elements, escaped_lines, font_sizes, text_xs, text_ys):
+        # Add rectangle to SVG elements
+        svg_elements.append(rect_element)
+
+        # Add the label at the centered position
+        # For multi-line text, need to add multiple <tspan> elements
+        # The first line starts at the text origin, each next line moves down by font_size
+        tspans = ''.join([
+            _TSPAN_FMT(text_x, font_size if i else 0, line)
+            for i, line in enumerate(lines)
+        ])
+        text_element = _TEXT_FMT(text_x, text_y + font_size, font_size, tspans)
+        svg_elements.append(text_element)
+
+    return svg_elements
+
+# Function to write the SVG elements wrapped in the HTML template to a file
+# The pieces are streamed straight into a large write buffer instead of building one string
+def write_html(output_html_path, svg_elements):
+    with open(output_html_path, 'w', buffering=1 << 20) as html_file:
+        html_file.write(HTML_HEAD)
+        html_file.write(SVG_HEADER)
+        html_file.writelines(f'{element}\n' for element in svg_elements)
+        html_file.write('</svg>')
+        html_file.write(HTML_TAIL)
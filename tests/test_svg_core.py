@@ -0,0 +1,43 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from svg_core import build_svg_elements, values_to_rows
+
+HEADER = ['Label', 'Corner Position 1', 'Corner Position 3', 'font_size']
+
+
+class BuildSvgElementsTest(unittest.TestCase):
+    def test_no_rows(self):
+        self.assertEqual(build_svg_elements([]), [])
+        self.assertEqual(build_svg_elements(values_to_rows([HEADER], 'Position')), [])
+
+    def test_no_drawable_rows(self):
+        rows = values_to_rows([HEADER, ['Hall', 'bad', '(1, 2)', 40]], 'Position')
+        self.assertEqual(build_svg_elements(rows), [])
+
+    def test_literal_eval_tuple_forms_are_drawn(self):
+        rows = values_to_rows([HEADER] + [
+            ['Hall', corner, '(10, 20)', 40]
+            for corner in ['(1, 2)', '[1, 2]', '1, 2', '(1.5, 2)', '(1, 2, 3)']
+        ], 'Position')
+        rects = build_svg_elements(rows)[::2]
+        self.assertEqual(len(rects), 5)
+        self.assertTrue(all(rect.startswith('<rect x="1" y="2" width="9" height="18"') for rect in rects))
+
+    def test_unbalanced_brackets_are_rejected(self):
+        rows = values_to_rows([HEADER] + [
+            ['Hall', corner, '(10, 20)', 40]
+            for corner in ['(1, 2', '(1, 2]', '1, 2)']
+        ], 'Position')
+        self.assertEqual(build_svg_elements(rows), [])
+
+    def test_label_is_escaped(self):
+        rows = values_to_rows([HEADER, ['a & <b>', '(0, 0)', '(100, 100)', 10]], 'Position')
+        self.assertIn('>a &amp; &lt;b&gt;</tspan>', build_svg_elements(rows)[1])
+
+
+if __name__ == '__main__':
+    unittest.main()